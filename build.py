@@ -328,7 +328,8 @@ def main():
     else:
         datasets = split_dataset(db, dataset, build_config)
 
-    pickle.dump(datasets, open(dataset_db_path(config), "wb"))
+    with open(dataset_db_path(config), "wb") as f:
+        pickle.dump(datasets, f, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ from typing import Dict
 from datetime import datetime
 import numpy as np
 
-from classify.trackprediction import Predictions
+from classify.trackprediction import Predictions, TrackPrediction
 from load.clip import Clip
 from load.cliptrackextractor import ClipTrackExtractor
 from ml_tools import tools
@@ -30,8 +30,16 @@ class ClipClassifier(CPTVFileProcessor):
 
         super(ClipClassifier, self).__init__(config, tracking_config)
 
+        # the labels are fixed for the life of the model so look them up once
+        self.labels = self.classifier.labels
+        self.num_labels = len(self.labels)
+        try:
+            self.fp_index = self.labels.index("false-positive")
+        except ValueError:
+            self.fp_index = None
+
         # prediction record for each track
-        self.predictions = Predictions(self.classifier.labels)
+        self.predictions = Predictions(self.labels)
 
         self.previewer = Previewer.create_if_required(config, config.classify.preview)
 
@@ -47,21 +55,6 @@ class ClipClassifier(CPTVFileProcessor):
             self.config.classify.cache_to_disk,
         )
 
-    def preprocess(self, frame, thermal_reference):
-        """
-        Applies preprocessing to frame required by the model.
-        :param frame: numpy array of shape [C, H, W]
-        :return: preprocessed numpy array
-        """
-
-        # note, would be much better if the model did this, as only the model knows how preprocessing occurred during
-        # training
-        frame = np.float32(frame)
-        frame[2 : 3 + 1] *= 1 / 256
-        frame[0] -= thermal_reference
-
-        return frame
-
     def identify_track(self, clip: Clip, track: Track):
         """
         Runs through track identifying segments, and then returns it's prediction of what kind of animal this is.
@@ -75,92 +68,118 @@ class ClipClassifier(CPTVFileProcessor):
         # faster, but potentially more unstable predictions.
         UNIFORM_PRIOR = False
 
-        num_labels = len(self.classifier.labels)
         prediction_smooth = 0.1
 
-        smooth_prediction = None
-        smooth_novelty = None
-
-        prediction = 0.0
-        novelty = 0.0
-        try:
-            fp_index = self.classifier.labels.index("false-positive")
-        except ValueError:
-            fp_index = None
+        track_prediction = self.predictions.get_or_create_prediction(track)
+        regions = track.bounds_history
 
-        # go through making classifications at each frame
+        # preprocess every frame we classify up front.
         # note: we should probably be doing this every 9 frames or so.
-        state = None
-        track_prediction = self.predictions.get_or_create_prediction(track)
-        for i, region in enumerate(track.bounds_history):
+        sampled_regions = regions[:: self.FRAME_SKIP]
+        thermal_references = []
+        track_data = []
+        failed = False
+        for region in sampled_regions:
             frame = clip.frame_buffer.get_frame(region.frame_number)
-            track_data = track.crop_by_region(frame, region)
-
-            # note: would be much better for the tracker to store the thermal references as it goes.
-            # frame = clip.frame_buffer.get_frame(frame_number)
-            thermal_reference = np.median(frame.thermal)
-            # track_data = track.crop_by_region_at_trackframe(frame, i)
-            if i % self.FRAME_SKIP == 0:
-                # we use a tighter cropping here so we disable the default 2 pixel inset
-                frames = Preprocessor.apply(
-                    [track_data], [thermal_reference], default_inset=0
-                )
-
-                if frames is None:
-                    logging.info(
-                        "Frame {} of track could not be classified.".format(
-                            region.frame_number
-                        )
+            cropped = track.crop_by_region(frame, region)
+            if min(cropped.shape[1:]) < Preprocessor.MIN_SIZE:
+                logging.info(
+                    "Frame {} of track could not be classified.".format(
+                        region.frame_number
                     )
-                    return
-
-                frame = frames[0]
-                (
-                    prediction,
-                    novelty,
-                    state,
-                ) = self.classifier.classify_frame_with_novelty(frame, state)
-
-                # make false-positive prediction less strong so if track has dead footage it won't dominate a strong
-                # score
-                if fp_index is not None:
-                    prediction[fp_index] *= 0.8
-
-                # a little weight decay helps the model not lock into an initial impression.
-                # 0.98 represents a half life of around 3 seconds.
-                state *= 0.98
-
-                # precondition on weight,  segments with small mass are weighted less as we can assume the error is
-                # higher here.
-                mass = region.mass
+                )
+                failed = True
+                break
+            # note: would be much better for the tracker to store the thermal references as it goes.
+            # only the crop and reference are kept so each frame can be released once it has been read
+            thermal_references.append(np.median(frame.thermal))
+            track_data.append(cropped)
+
+        if not track_data:
+            return None if failed else track_prediction
+        classified_regions = sampled_regions[: len(track_data)]
+
+        # we use a tighter cropping here so we disable the default 2 pixel inset
+        frames = Preprocessor.apply(track_data, thermal_references, default_inset=0)
+        # the preprocessor writes the delta between consecutive frames into the filtered channel,
+        # but frames are classified one at a time so the model expects no previous frame there.
+        frames[:, 1] = 0
+
+        # the lstm state carries from one frame to the next so frames have to be classified in order
+        predictions = []
+        novelties = []
+        state = None
+        for frame in frames:
+            (
+                prediction,
+                novelty,
+                state,
+            ) = self.classifier.classify_frame_with_novelty(frame, state)
+            # a little weight decay helps the model not lock into an initial impression.
+            # 0.98 represents a half life of around 3 seconds.
+            state *= 0.98
+            predictions.append(prediction)
+            novelties.append(novelty)
+        predictions = np.array(predictions)
+
+        # make false-positive prediction less strong so if track has dead footage it won't dominate a strong
+        # score
+        if self.fp_index is not None:
+            predictions[:, self.fp_index] *= 0.8
+
+        # precondition on weight,  segments with small mass are weighted less as we can assume the error is
+        # higher here.
+        mass = np.fromiter(
+            (region.mass for region in classified_regions),
+            dtype=np.float64,
+            count=len(classified_regions),
+        )
 
-                # we use the square-root here as the mass is in units squared.
-                # this effectively means we are giving weight based on the diameter
-                # of the object rather than the mass.
-                mass_weight = np.clip(mass / 20, 0.02, 1.0) ** 0.5
+        # we use the square-root here as the mass is in units squared.
+        # this effectively means we are giving weight based on the diameter
+        # of the object rather than the mass.
+        weight = np.sqrt(np.clip(mass / 20, 0.02, 1.0))
 
-                # cropped frames don't do so well so restrict their score
-                cropped_weight = 0.7 if region.was_cropped else 1.0
+        # cropped frames don't do so well so restrict their score
+        weight *= np.fromiter(
+            (0.7 if region.was_cropped else 1.0 for region in classified_regions),
+            dtype=np.float64,
+            count=len(classified_regions),
+        )
 
-                prediction *= mass_weight * cropped_weight
+        predictions *= weight[:, np.newaxis]
 
-            if smooth_prediction is None:
-                if UNIFORM_PRIOR:
-                    smooth_prediction = np.ones([num_labels]) * (1 / num_labels)
-                else:
-                    smooth_prediction = prediction
-                smooth_novelty = 0.5
-            else:
-                smooth_prediction = (
-                    1 - prediction_smooth
-                ) * smooth_prediction + prediction_smooth * prediction
-                smooth_novelty = (
-                    1 - prediction_smooth
-                ) * smooth_novelty + prediction_smooth * novelty
+        # skipped frames are interpolated between the classified frames either side of them.
+        # if a frame could not be classified only the frames before it are recorded
+        if failed:
+            regions = regions[: len(frames) * self.FRAME_SKIP]
+        predictions = tools.interpolate_skipped(
+            predictions, self.FRAME_SKIP, len(regions)
+        )
+        novelties = tools.interpolate_skipped(
+            np.array(novelties), self.FRAME_SKIP, len(regions)
+        )
+        if self.config.classify.smoothing == TrackPrediction.SMOOTHING_MEDIAN:
+            size = self.config.classify.median_smoothing_frames
+            smooth_predictions = tools.median_smooth(predictions, size)
+            smooth_novelties = tools.median_smooth(novelties, size)
+        else:
+            if UNIFORM_PRIOR:
+                predictions[0] = 1 / self.num_labels
+            novelties[0] = 0.5
+            smooth_predictions = tools.exponential_smooth(
+                predictions, prediction_smooth
+            )
+            smooth_novelties = tools.exponential_smooth(novelties, prediction_smooth)
+        for region, smooth_prediction, smooth_novelty in zip(
+            regions, smooth_predictions, smooth_novelties
+        ):
             track_prediction.classified_frame(
                 region.frame_number, smooth_prediction, smooth_novelty
             )
 
+        if failed:
+            return None
         return track_prediction
 
     @property
@@ -247,7 +266,7 @@ class ClipClassifier(CPTVFileProcessor):
 
         for i, track in enumerate(clip.tracks):
             prediction = self.identify_track(clip, track)
-            description = prediction.description(self.classifier.labels)
+            description = prediction.description(self.labels)
             logging.info(
                 " - [{}/{}] prediction: {}".format(i + 1, len(clip.tracks), description)
             )
@@ -298,20 +317,20 @@ class ClipClassifier(CPTVFileProcessor):
             track_info["num_frames"] = prediction.num_frames
             track_info["frame_start"] = track.start_frame
             track_info["frame_end"] = track.end_frame
-            track_info["label"] = self.classifier.labels[prediction.best_label_index]
+            track_info["label"] = self.labels[prediction.best_label_index]
             track_info["confidence"] = round(prediction.score(), 2)
             track_info["clarity"] = round(prediction.clarity, 3)
             track_info["average_novelty"] = round(prediction.average_novelty, 2)
             track_info["max_novelty"] = round(prediction.max_novelty, 2)
             track_info["all_class_confidences"] = {}
             for i, value in enumerate(prediction.class_best_score):
-                label = self.classifier.labels[i]
+                label = self.labels[i]
                 track_info["all_class_confidences"][label] = round(float(value), 3)
 
             positions = []
             for region in track.bounds_history:
                 track_time = round(region.frame_number / clip.frames_per_second, 2)
-                positions.append([track_time, region])
+                positions.append([track_time, [int(v) for v in region.to_ltrb()]])
             track_info["positions"] = positions
 
         if self.config.classify.meta_to_stdout:
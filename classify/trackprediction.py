@@ -40,6 +40,11 @@ class TrackPrediction:
     track.
     """
 
+    # ways predictions can be smoothed over the frames of a track
+    SMOOTHING_EMA = "ema"
+    SMOOTHING_MEDIAN = "median"
+    SMOOTHING_OPTIONS = [SMOOTHING_EMA, SMOOTHING_MEDIAN]
+
     def __init__(self, track_id, start_frame, keep_all=True):
         self.track_prediction = None
         self.state = None
@@ -133,22 +138,25 @@ class TrackPrediction:
         :param classes: Name of class for each label.
         :return:
         """
-        score = self.max_score
-        if score is None:
+        if self.class_best_score is None:
             return None
 
+        # one sort gives the scores of both the best and second best guess
+        order = np.argsort(self.class_best_score)
+        score = float(self.class_best_score[order[-1]])
+        second_label = order[-2]
+        second_score = float(self.class_best_score[second_label])
+
         if score > 0.5:
             first_guess = "{} {:.1f} (clarity {:.1f})".format(
-                labels[self.best_label_index], score * 10, self.clarity * 10
+                labels[self.best_label_index], score * 10, (score - second_score) * 10
             )
         else:
             first_guess = "[nothing]"
 
-        second_score = self.score(2)
-
         if second_score > 0.5:
             second_guess = "[second guess - {} {:.1f}]".format(
-                labels[self.label_index(2)], second_score * 10
+                labels[second_label], second_score * 10
             )
         else:
             second_guess = ""
@@ -228,10 +236,13 @@ class TrackPrediction:
         )
 
     def guesses(self, labels):
+        if self.class_best_score is None:
+            return []
+        best = np.argsort(self.class_best_score)[: -4 : -1]
         guesses = [
-            "{} ({:.1f})".format(labels[self.label_index(i)], self.score(i) * 10)
-            for i in range(1, 4)
-            if self.score(i) > 0.5
+            "{} ({:.1f})".format(labels[i], float(self.class_best_score[i]) * 10)
+            for i in best
+            if self.class_best_score[i] > 0.5
         ]
         return guesses
 
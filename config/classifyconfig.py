@@ -22,6 +22,7 @@ import os.path as path
 import attr
 
 
+from classify.trackprediction import TrackPrediction
 from config import config
 from .defaultconfig import DefaultConfig
 from ml_tools.previewer import Previewer
@@ -35,6 +36,8 @@ class ClassifyConfig(DefaultConfig):
     preview = attr.ib()
     classify_folder = attr.ib()
     cache_to_disk = attr.ib()
+    smoothing = attr.ib()
+    median_smoothing_frames = attr.ib()
 
     @classmethod
     def load(cls, classify, base_folder):
@@ -46,6 +49,10 @@ class ClassifyConfig(DefaultConfig):
             ),
             classify_folder=path.join(base_folder, classify["classify_folder"]),
             cache_to_disk=classify["cache_to_disk"],
+            smoothing=config.parse_options_param(
+                "smoothing", classify["smoothing"], TrackPrediction.SMOOTHING_OPTIONS
+            ),
+            median_smoothing_frames=classify["median_smoothing_frames"],
         )
 
     @classmethod
@@ -56,8 +63,12 @@ class ClassifyConfig(DefaultConfig):
             preview="none",
             classify_folder="classify",
             cache_to_disk=True,
+            smoothing=TrackPrediction.SMOOTHING_EMA,
+            median_smoothing_frames=9,
         )
 
     def validate(self):
         if self.model is None:
             raise KeyError("model not found in configuration file")
+        if self.median_smoothing_frames < 1 or self.median_smoothing_frames % 2 == 0:
+            raise ValueError("median_smoothing_frames must be a positive odd number")
@@ -0,0 +1,36 @@
+import attr
+import pytest
+
+from .config import Config
+from .classifyconfig import ClassifyConfig
+
+
+def classify_section(**kwargs):
+    section = {
+        "model": "model",
+        "meta_to_stdout": False,
+        "preview": "none",
+        "classify_folder": "classify",
+        "cache_to_disk": True,
+        "smoothing": "ema",
+        "median_smoothing_frames": 9,
+    }
+    section.update(kwargs)
+    return section
+
+
+class TestClassifyConfig:
+    def test_smoothing_options(self):
+        classify = ClassifyConfig.load(classify_section(smoothing="Median"), "/data")
+        assert classify.smoothing == "median"
+
+        with pytest.raises(Exception, match="smoothing"):
+            ClassifyConfig.load(classify_section(smoothing="mean"), "/data")
+
+    def test_median_smoothing_frames(self):
+        classify = attr.evolve(Config.get_defaults().classify, model="model")
+        classify.validate()
+
+        for frames in [0, -3, 4]:
+            with pytest.raises(ValueError):
+                attr.evolve(classify, median_smoothing_frames=frames).validate()
@@ -61,6 +61,7 @@ class Clip:
         self.res_y = None
         self.background_frames = 0
         self.background_is_preview = trackconfig.background_calc == Clip.PREVIEW
+        self.disable_background_subtraction = False
         self.config = trackconfig
         self.frames_per_second = Clip.FRAMES_PER_SECOND
 
@@ -83,7 +83,8 @@ class ClipTrackExtractor:
                     clip._set_from_background()
                     self._process_preview_frames(clip)
             else:
-                self.process_frames(clip, [np.float32(frame.pix) for frame in reader])
+                # stack the clip once, the background and whole clip stats all work from this array
+                self.process_frames(clip, np.float32([frame.pix for frame in reader]))
 
         if not clip.from_metadata:
             self.apply_track_filtering(clip)
@@ -113,19 +114,21 @@ class ClipTrackExtractor:
         clip.preview_frames = None
 
     def _whole_clip_stats(self, clip, frames):
-        filtered = np.float32(
-            [self._get_filtered_frame(clip, frame) for frame in frames]
-        )
+        filtered = np.empty_like(frames)
+        for i, frame in enumerate(frames):
+            filtered[i] = self._get_filtered_frame(clip, frame)
 
-        delta = np.asarray(frames[1:], dtype=np.float32) - np.asarray(
-            frames[:-1], dtype=np.float32
-        )
-        average_delta = float(np.mean(np.abs(delta)))
+        delta = np.diff(frames, axis=0)
+        average_delta = float(np.mean(np.abs(delta, out=delta)))
+        filtered_deviation = float(np.mean(np.abs(filtered)))
 
         # take half the max filtered value as a threshold
+        # filtered is not needed after this so let percentile partition it in place
         threshold = float(
             np.percentile(
-                np.reshape(filtered, [-1]), q=self.config.threshold_percentile
+                np.reshape(filtered, [-1]),
+                q=self.config.threshold_percentile,
+                overwrite_input=True,
             )
         )
 
@@ -138,7 +141,7 @@ class ClipTrackExtractor:
             clip.stats.threshold = threshold
             clip.stats.temp_thresh = self.config.temp_thresh
             clip.stats.average_delta = float(average_delta)
-            clip.stats.filtered_deviation = float(np.mean(np.abs(filtered)))
+            clip.stats.filtered_deviation = filtered_deviation
             clip.stats.is_static_background = (
                 clip.stats.filtered_deviation < clip.config.static_background_threshold
             )
@@ -150,6 +153,11 @@ class ClipTrackExtractor:
                 clip.background = None
 
     def process_frames(self, clip, frames):
+        """
+        Processes a whole clip at once.
+        :param frames: numpy array of shape [frames, height, width]
+        """
+        frames = np.asarray(frames, dtype=np.float32)
         # for now just always calculate as we are using the stats...
         # background np.float64[][] filtered calculated here and stats
         clip.background_from_whole_clip(frames)
@@ -164,8 +172,8 @@ class ClipTrackExtractor:
                 )
 
         # process each frame
-        for frame_number, frame in enumerate(frames):
-            self._process_frame(clip, frame_number, frame)
+        for frame in frames:
+            self.process_frame(clip, frame)
 
     def apply_track_filtering(self, clip):
         self.filter_tracks(clip)
@@ -183,11 +191,14 @@ class ClipTrackExtractor:
         """
 
         # has to be a signed int so we dont get overflow
-        filtered = np.float32(thermal.copy())
+        # each branch makes one new array and then works on it in place
         if clip.background is None:
-            filtered = filtered - np.median(filtered) - 40
-            filtered[filtered < 0] = 0
+            filtered = thermal.astype(np.float32)
+            filtered -= np.median(filtered)
+            filtered -= 40
+            np.maximum(filtered, 0, out=filtered)
         elif clip.background_is_preview:
+            filtered = thermal.astype(np.float32)
             avg_change = int(
                 round(np.average(thermal) - clip.stats.mean_background_value)
             )
@@ -195,9 +206,9 @@ class ClipTrackExtractor:
             np.clip(filtered - clip.background - avg_change, 0, None, out=filtered)
 
         else:
-            filtered = filtered - clip.background
-            filtered = filtered - np.median(filtered)
-            filtered[filtered < 0] = 0
+            filtered = np.float32(thermal) - clip.background
+            filtered -= np.median(filtered)
+            np.maximum(filtered, 0, out=filtered)
         return filtered
 
     def _process_frame(self, clip, thermal, ffc_affected=False):
@@ -217,7 +228,6 @@ class ClipTrackExtractor:
         thresh, mass = tools.blur_and_return_as_mask(
             edgeless_filtered, threshold=clip.threshold
         )
-        thresh = np.uint8(thresh)
         dilated = thresh
 
         # Dilation groups interested pixels that are near to each other into one component(animal/track)
@@ -260,73 +270,91 @@ class ClipTrackExtractor:
             new_tracks = set()
         self._filter_inactive_tracks(clip, new_tracks, matched_tracks)
 
-    def get_max_size_change(self, track, region):
-        exiting = region.is_along_border and not track.last_bound.is_along_border
-        entering = not exiting and track.last_bound.is_along_border
-
-        min_change = 50
-        if entering or exiting:
-            min_change = 100
-        max_size_change = np.clip(track.last_mass, min_change, 500)
-        return max_size_change
+    def get_max_size_change(self, track, along_border):
+        """
+        Works out how much each region is allowed to change size by and still match this track.
+        :param along_border: numpy bool array of which regions are along the border
+        :return: numpy array of the max size change for each region
+        """
+        # a track entering or exiting the frame is allowed to change size more
+        if track.last_bound.is_along_border:
+            min_change = np.full(len(along_border), 100)
+        else:
+            min_change = np.where(along_border, 100, 50)
+        return np.minimum(np.maximum(track.last_mass, min_change), 500)
 
     def _match_existing_tracks(self, clip, regions):
 
         scores = []
-        used_regions = set()
-        unmatched_regions = set(regions)
-        for track in clip.active_tracks:
-            for region in regions:
-                score, size_change = track.get_track_region_score(
-                    region, self.config.moving_vel_thresh
-                )
-                # we give larger tracks more freedom to find a match as they might move quite a bit.
-                max_distance = np.clip(7 * track.last_mass, 900, 9025)
-                max_size_change = self.get_max_size_change(track, region)
+        if not regions:
+            return [], set()
+
+        region_bounds = np.array(
+            [(region.x, region.y, region.width, region.height) for region in regions],
+            dtype=np.int64,
+        )
+        along_border = np.array([region.is_along_border for region in regions])
+        # go through tracks in id order so equal scores always resolve the same way
+        for track in sorted(clip.active_tracks, key=lambda track: track.get_id()):
+            # we give larger tracks more freedom to find a match as they might move quite a bit.
+            max_distance = min(max(7 * track.last_mass, 900), 9025)
+            distances, size_changes = track.get_track_region_scores(
+                region_bounds, self.config.moving_vel_thresh
+            )
+            max_size_changes = self.get_max_size_change(track, along_border)
+            close_enough = distances <= max_distance
+            similar_size = size_changes <= max_size_changes
 
-                if score > max_distance:
+            if self.config.verbose:
+                for i in np.flatnonzero(~close_enough):
                     self.print_if_verbose(
                         "track {} distance score {} bigger than max score {}".format(
-                            track.get_id(), score, max_distance
+                            track.get_id(), distances[i], max_distance
                         )
                     )
-
-                    continue
-                if size_change > max_size_change:
+                for i in np.flatnonzero(close_enough & ~similar_size):
                     self.print_if_verbose(
                         "track {} size_change {} bigger than max size_change {}".format(
-                            track.get_id(), size_change, max_size_change
+                            track.get_id(), size_changes[i], max_size_changes[i]
                         )
                     )
-                    continue
-                scores.append((score, track, region))
+
+            for i in np.flatnonzero(close_enough & similar_size):
+                scores.append((distances[i], track, i))
         scores.sort(key=lambda record: record[0])
 
         matched_tracks = set()
-        for (score, track, region) in scores:
-            if track in matched_tracks or region in used_regions:
+        used_regions = np.zeros(len(regions), dtype=bool)
+        for (score, track, i) in scores:
+            if track in matched_tracks or used_regions[i]:
                 continue
-            track.add_region(region)
+            track.add_region(regions[i])
             matched_tracks.add(track)
-            used_regions.add(region)
-            unmatched_regions.remove(region)
+            used_regions[i] = True
 
+        # keep unmatched regions in frame order so new tracks are always created in the same order
+        unmatched_regions = [
+            region for region, used in zip(regions, used_regions) if not used
+        ]
         return unmatched_regions, matched_tracks
 
     def _create_new_tracks(self, clip, unmatched_regions):
         """ Create new tracks for any unmatched regions """
         new_tracks = set()
+        # bounds of all active tracks as [N, 4] ltrb, kept up to date as new tracks are created
+        active_bounds = np.array(
+            [track.last_bound.to_ltrb() for track in clip.active_tracks]
+        ).reshape(-1, 4)
         for region in unmatched_regions:
             # make sure we don't overlap with existing tracks.  This can happen if a tail gets tracked as a new object
-            overlaps = [
-                track.last_bound.overlap_area(region) for track in clip.active_tracks
-            ]
-            if len(overlaps) > 0 and max(overlaps) > (region.area * 0.25):
+            overlaps = region.overlap_areas(active_bounds)
+            if len(overlaps) > 0 and overlaps.max() > (region.area * 0.25):
                 continue
 
             track = Track.from_region(clip, region)
             new_tracks.add(track)
             clip._add_active_track(track)
+            active_bounds = np.vstack((active_bounds, region.to_ltrb()))
             self.print_if_verbose(
                 "Creating a new track {} with region {} mass{} area {}".format(
                     track.get_id(), region, track.last_bound.mass, track.last_bound.area
@@ -370,52 +398,55 @@ class ClipTrackExtractor:
         # we enlarge the rects a bit, partly because we eroded them previously, and partly because we want some context.
         padding = self.frame_padding
         edge = self.config.edge_pixels
+        # stats rows are [left, top, width, height, area], row 0 is the background.
+        # Add padding to all the boxes and change coordinates from edgeless image -> full image in one go,
+        # storing them as [left, top, right, bottom]
+        padded = np.int32(stats[1:labels, :4])
+        padded[:, :2] += edge - padding
+        padded[:, 2:] += padded[:, :2] + padding * 2
+
+        crop = clip.crop_rectangle
+        cropped = padded.copy()
+        cropped[:, :2] = np.maximum(padded[:, :2], (crop.left, crop.top))
+        cropped[:, 2:] = np.minimum(padded[:, 2:], (crop.right, crop.bottom))
+        was_cropped = np.any(cropped != padded, axis=1)
+
+        # decide which cropped regions to keep before creating any regions
+        strategy = self.config.cropped_regions_strategy
+        if strategy == "cautious":
+            padded_size = padded[:, 2:] - padded[:, :2]
+            cropped_size = cropped[:, 2:] - cropped[:, :2]
+            crop_fraction = (padded_size - cropped_size) / padded_size
+            keep = np.all(crop_fraction <= 0.25, axis=1)
+        elif strategy == "none":
+            keep = ~was_cropped
+        elif strategy == "all":
+            keep = np.ones(len(padded), dtype=bool)
+        else:
+            raise ValueError(
+                "Invalid mode for CROPPED_REGIONS_STRATEGY, expected ['all','cautious','none'] but found {}".format(
+                    strategy
+                )
+            )
+
         # find regions of interest
         regions = []
-        for i in range(1, labels):
-
+        for i in np.flatnonzero(keep):
+            left, top, right, bottom = cropped[i]
+            # want the real mass calculated from before the dilation
+            # region.mass = np.sum(region.subimage(thresh))
             region = Region(
-                stats[i, 0],
-                stats[i, 1],
-                stats[i, 2],
-                stats[i, 3],
-                stats[i, 4],
+                left,
+                top,
+                right - left,
+                bottom - top,
+                mass,
                 0,
-                i,
+                int(i) + 1,
                 clip.frame_on,
+                was_cropped=bool(was_cropped[i]),
             )
-            # want the real mass calculated from before the dilation
-            # region.mass = np.sum(region.subimage(thresh))
-            region.mass = mass
-            # Add padding to region and change coordinates from edgeless image -> full image
-            region.x += edge - padding
-            region.y += edge - padding
-            region.width += padding * 2
-            region.height += padding * 2
-
-            old_region = region.copy()
-            region.crop(clip.crop_rectangle)
-            region.was_cropped = str(old_region) != str(region)
             region.set_is_along_border(clip.crop_rectangle)
-            if self.config.cropped_regions_strategy == "cautious":
-                crop_width_fraction = (
-                    old_region.width - region.width
-                ) / old_region.width
-                crop_height_fraction = (
-                    old_region.height - region.height
-                ) / old_region.height
-                if crop_width_fraction > 0.25 or crop_height_fraction > 0.25:
-                    continue
-            elif self.config.cropped_regions_strategy == "none":
-                if region.was_cropped:
-                    continue
-            elif self.config.cropped_regions_strategy != "all":
-                raise ValueError(
-                    "Invalid mode for CROPPED_REGIONS_STRATEGY, expected ['all','cautious','none'] but found {}".format(
-                        self.config.cropped_regions_strategy
-                    )
-                )
-
             if delta_frame is not None:
                 region_difference = region.subimage(delta_frame)
                 region.pixel_variance = np.var(region_difference)
@@ -1,8 +1,12 @@
 import logging
 import multiprocessing
 import os
+import re
 import time
-from datetime import datetime
+
+# recordings are named starting with the date they were made, e.g. 20190102-123456-device.cptv
+FILENAME_DATE = re.compile(r"\d{8}")
+FILENAME_DATE_FORMAT = "%Y%m%d"
 
 
 def process_job(job):
@@ -19,6 +23,21 @@ def process_job(job):
     time.sleep(0.001)  # apparently gives me a chance to catch the control-c
 
 
+# the processor used by jobs in a worker process, set once when the worker starts.
+_worker_processor = None
+
+
+def init_worker(processor):
+    """ Stores the processor to use for all jobs run in this worker process. """
+    global _worker_processor
+    _worker_processor = processor
+
+
+def process_worker_job(job):
+    """ Runs a (path, params) job using the processor this worker was started with. """
+    process_job((_worker_processor,) + tuple(job))
+
+
 class CPTVFileProcessor:
     """
     Base class for processing a collection of CPTV video files.
@@ -72,13 +91,19 @@ class CPTVFileProcessor:
         :return: returns true if file should be processed, false otherwise
         """
 
-        # check date filters
-        date_part = str(os.path.basename(filename).split("-")[0])
-        date = datetime.strptime(date_part, "%Y%m%d")
-        if self.start_date and date < self.start_date:
-            return False
-        if self.end_date and date > self.end_date:
-            return False
+        # check date filters, dates in this format sort the same as strings so no need to parse
+        if self.start_date or self.end_date:
+            date_part = os.path.basename(filename).split("-")[0]
+            if not FILENAME_DATE.fullmatch(date_part):
+                raise ValueError("Could not find date in filename {}".format(filename))
+            if self.start_date and date_part < self.start_date.strftime(
+                FILENAME_DATE_FORMAT
+            ):
+                return False
+            if self.end_date and date_part > self.end_date.strftime(
+                FILENAME_DATE_FORMAT
+            ):
+                return False
 
         # look to see of the destination file already exists.
         classify_name = self.get_classify_filename(filename)
@@ -101,11 +126,14 @@ class CPTVFileProcessor:
             for job in jobs:
                 process_job(job)
         else:
-            # send the jobs to a worker pool
-            pool = multiprocessing.Pool(self.workers_threads)
+            # send the jobs to a worker pool, the processor is only sent once to each worker
+            # rather than with every job
+            pool = multiprocessing.Pool(
+                self.workers_threads, initializer=init_worker, initargs=(self,)
+            )
             try:
                 # see https://stackoverflow.com/questions/11312525/catch-ctrlc-sigint-and-exit-multiprocesses-gracefully-in-python
-                pool.map(process_job, jobs, chunksize=1)
+                pool.map(process_worker_job, [job[1:] for job in jobs], chunksize=1)
                 pool.close()
                 pool.join()
             except KeyboardInterrupt:
@@ -341,9 +341,13 @@ class Preprocessor:
         left_offset = random.randint(0, 5) if augment else default_inset
         right_offset = random.randint(0, 5) if augment else default_inset
 
-        scaled_frames = []
+        assert len(frames) == len(
+            reference_level
+        ), "Reference level shape and data shape not match."
+
+        data = None
 
-        for frame in frames:
+        for i, frame in enumerate(frames):
 
             channels, frame_height, frame_width = frame.shape
 
@@ -379,36 +383,35 @@ class Preprocessor:
                 crop_region.left : crop_region.right,
             ]
 
-            scaled_frame = [
-                cv2.resize(
+            # scale straight into a preallocated [F,C,H,W] array
+            if data is None:
+                data = np.empty(
+                    (
+                        len(frames),
+                        channels,
+                        Preprocessor.FRAME_SIZE,
+                        Preprocessor.FRAME_SIZE,
+                    ),
+                    dtype=np.float32,
+                )
+            for channel in range(channels):
+                data[i, channel] = cv2.resize(
                     cropped_frame[channel],
                     dsize=(Preprocessor.FRAME_SIZE, Preprocessor.FRAME_SIZE),
                     interpolation=cv2.INTER_LINEAR
                     if channel != TrackChannels.mask
                     else cv2.INTER_NEAREST,
                 )
-                for channel in range(channels)
-            ]
-            scaled_frame = np.float32(scaled_frame)
 
-            scaled_frames.append(scaled_frame)
-
-        # convert back into [F,C,H,W] array.
-        data = np.float32(scaled_frames)
-
-        # -------------------------------------------
-        # next adjust temperature and flow levels
-        # get reference level for thermal channel
-        assert len(data) == len(
-            reference_level
-        ), "Reference level shape and data shape not match."
+            # -------------------------------------------
+            # next adjust temperature and flow levels while the frame is still in cache
 
-        # reference thermal levels to the reference level
-        data[:, 0, :, :] -= np.float32(reference_level)[:, np.newaxis, np.newaxis]
+            # reference thermal levels to the reference level
+            data[i, 0] -= np.float32(reference_level[i])
 
-        # map optical flow down to right level,
-        # we pre-multiplied by 256 to fit into a 16bit int
-        data[:, 2 : 3 + 1, :, :] *= 1.0 / 256.0
+            # map optical flow down to right level,
+            # we pre-multiplied by 256 to fit into a 16bit int
+            data[i, 2 : 3 + 1] *= 1.0 / 256.0
 
         # write frame motion into center of frame
         if encode_frame_offsets_in_flow:
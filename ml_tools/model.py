@@ -278,21 +278,16 @@ class Model:
         assert None not in nodes, "Requests output of 'None' node."
 
         total_samples = batch_X.shape[0]
-        batches = (total_samples // self.batch_size) + 1
 
         output_lists = {}
         for node in nodes:
             output_lists[node] = []
 
-        for i in range(batches):
-            Xm = batch_X[i * self.batch_size : (i + 1) * self.batch_size]
-            if len(Xm) == 0:
-                continue
-
+        for start in range(0, total_samples, self.batch_size):
+            Xm = batch_X[start : start + self.batch_size]
             outputs = self.session.run(nodes, feed_dict={self.X: Xm})
             for node, output in zip(nodes, outputs):
-                for i in range(len(output)):
-                    output_lists[node].append(output[i])
+                output_lists[node].extend(output)
 
         return output_lists
 
@@ -1,6 +1,8 @@
 import locale
 import os
+from queue import Queue
 import subprocess
+import threading
 
 
 class MPEGCreator:
@@ -18,23 +20,38 @@ class MPEGCreator:
     The output from ffmpeg is available via the `output` property.
     """
 
+    # number of frames that can be waiting to be written to ffmpeg
+    QUEUE_SIZE = 8
+
     def __init__(self, filename, quality=21):
         self.filename = filename
         self.quality = quality
         self._ffmpeg = None
         self._output = []
+        self._frames = None
+        self._writer = None
+        self._write_error = None
 
     def next_frame(self, frame):
         if self._ffmpeg is None:
             height, width, _ = frame.shape
             self._ffmpeg = self._start(width, height)
+            # frames are written to ffmpeg from a separate thread so the caller can
+            # prepare the next frame while ffmpeg is busy encoding
+            self._frames = Queue(maxsize=self.QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._write_frames, daemon=True)
+            self._writer.start()
+        if self._write_error:
+            raise self._write_error
 
-        self._ffmpeg.stdin.write(frame.tobytes())
+        self._frames.put(frame.tobytes())
 
     def close(self):
         if not self._ffmpeg:
             return
 
+        self._frames.put(None)
+        self._writer.join()
         self._ffmpeg.stdin.close()
 
         return_code = self._ffmpeg.wait(timeout=60)
@@ -45,6 +62,20 @@ class MPEGCreator:
                     return_code, self.output
                 )
             )
+        if self._write_error:
+            raise self._write_error
+
+    def _write_frames(self):
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            # keep draining the queue after an error so next_frame never blocks
+            if self._write_error is None:
+                try:
+                    self._ffmpeg.stdin.write(frame)
+                except OSError as e:
+                    self._write_error = e
 
     @property
     def output(self):
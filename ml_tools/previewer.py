@@ -18,8 +18,10 @@ along with this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 
+from functools import lru_cache
 import logging
 from os import path
+import cv2
 import numpy as np
 
 from PIL import Image, ImageDraw, ImageFont
@@ -103,6 +105,9 @@ class Previewer:
 
         logging.info("creating clip preview %s", filename)
 
+        # descriptions are only needed for this clip, so don't keep the last clip's tracks alive
+        self.track_descs = {}
+
         # increased resolution of video file.
         # videos look much better scaled up
         if not clip.stats:
@@ -119,16 +124,23 @@ class Previewer:
             self.create_track_descriptions(clip, predictions)
 
         if clip.stats.min_temp is None or clip.stats.max_temp is None:
-            thermals = [frame.thermal for frame in clip.frame_buffer.frames]
-            clip.stats.min_temp = np.amin(thermals)
-            clip.stats.max_temp = np.amax(thermals)
+            # reduce each frame in turn rather than stacking the whole clip into one array
+            frames = clip.frame_buffer.frames
+            clip.stats.min_temp = min(np.amin(frame.thermal) for frame in frames)
+            clip.stats.max_temp = max(np.amax(frame.thermal) for frame in frames)
+        # raw thermal values are whole numbers so they can be coloured by lookup
+        heat_lut = tools.get_heat_lut(
+            self.colourmap, clip.stats.min_temp, clip.stats.max_temp
+        )
         mpeg = MPEGCreator(filename)
         for frame_number, frame in enumerate(clip.frame_buffer):
             if self.preview_type == self.PREVIEW_RAW:
                 image = self.convert_and_resize(
-                    frame.thermal, clip.stats.min_temp, clip.stats.max_temp
+                    frame.thermal,
+                    clip.stats.min_temp,
+                    clip.stats.max_temp,
+                    heat_lut=heat_lut,
                 )
-                draw = ImageDraw.Draw(image)
             elif self.preview_type == self.PREVIEW_TRACKING:
                 image = self.create_four_tracking_image(frame, clip.stats.min_temp)
                 image = self.convert_and_resize(
@@ -136,35 +148,42 @@ class Previewer:
                     clip.stats.min_temp,
                     clip.stats.max_temp,
                     3.0,
-                    mode=Image.NEAREST,
+                    interpolation=cv2.INTER_NEAREST,
                 )
-                draw = ImageDraw.Draw(image)
-                self.add_tracks(draw, clip.tracks, frame_number, predictions)
-
-            elif self.preview_type == self.PREVIEW_BOXES:
+            elif self.preview_type in (self.PREVIEW_BOXES, self.PREVIEW_CLASSIFIED):
                 image = self.convert_and_resize(
-                    frame.thermal, clip.stats.min_temp, clip.stats.max_temp, 4.0
-                )
-                draw = ImageDraw.Draw(image)
-                screen_bounds = Region(0, 0, image.width, image.height)
-                self.add_tracks(
-                    draw, clip.tracks, frame_number, colours=[(128, 255, 255)]
+                    frame.thermal,
+                    clip.stats.min_temp,
+                    clip.stats.max_temp,
+                    4.0,
+                    heat_lut=heat_lut,
                 )
 
-            elif self.preview_type == self.PREVIEW_CLASSIFIED:
-                image = self.convert_and_resize(
-                    frame.thermal, clip.stats.min_temp, clip.stats.max_temp, 4.0
-                )
+            # overlays are drawn with PIL, so only convert when there is something to draw
+            if self.preview_type != self.PREVIEW_RAW or self.debug:
+                image = Image.fromarray(image)
                 draw = ImageDraw.Draw(image)
-                screen_bounds = Region(0, 0, image.width, image.height)
-                self.add_tracks(
-                    draw, clip.tracks, frame_number, predictions, screen_bounds
-                )
-            if self.debug and draw:
-                self.add_footer(
-                    draw, image.width, image.height, footer, frame.ffc_affected
-                )
-            mpeg.next_frame(np.asarray(image))
+                if self.debug:
+                    tools.add_heat_number(
+                        image, frame.thermal[:120, :160], self.frame_scale
+                    )
+                if self.preview_type == self.PREVIEW_TRACKING:
+                    self.add_tracks(draw, clip.tracks, frame_number, predictions)
+                elif self.preview_type == self.PREVIEW_BOXES:
+                    self.add_tracks(
+                        draw, clip.tracks, frame_number, colours=[(128, 255, 255)]
+                    )
+                elif self.preview_type == self.PREVIEW_CLASSIFIED:
+                    screen_bounds = Region(0, 0, image.width, image.height)
+                    self.add_tracks(
+                        draw, clip.tracks, frame_number, predictions, screen_bounds
+                    )
+                if self.debug:
+                    self.add_footer(
+                        draw, image.width, image.height, footer, frame.ffc_affected
+                    )
+                image = np.asarray(image)
+            mpeg.next_frame(image)
 
             # we store the entire video in memory so we need to cap the frame count at some point.
             if frame_number > clip.frames_per_second * 60 * 10:
@@ -185,40 +204,55 @@ class Previewer:
             for region in track.bounds_history:
                 frame = clip.frame_buffer.get_frame(region.frame_number)
                 frame = track.crop_by_region(frame, region)
-                img = tools.convert_heat_to_img(
+                img = tools.convert_heat_to_rgb(
                     frame[TrackChannels.thermal], self.colourmap, 0, 350
                 )
-                img = img.resize((frame_width, frame_height), Image.NEAREST)
-                video_frames.append(np.asarray(img))
+                img = cv2.resize(
+                    img, (frame_width, frame_height), interpolation=cv2.INTER_NEAREST
+                )
+                video_frames.append(img)
 
             logging.info("creating preview %s", filename_format.format(id + 1))
             tools.write_mpeg(filename_format.format(id + 1), video_frames)
 
-    def convert_and_resize(self, frame, h_min, h_max, size=None, mode=Image.BILINEAR):
-        """ Converts the image to colour using colour map and resize """
-        thermal = frame[:120, :160].copy()
-        image = tools.convert_heat_to_img(frame, self.colourmap, h_min, h_max)
+    def convert_and_resize(
+        self,
+        frame,
+        h_min,
+        h_max,
+        size=None,
+        interpolation=cv2.INTER_LINEAR,
+        heat_lut=None,
+    ):
+        """
+        Converts the image to colour using colour map and resize
+        :param heat_lut: optional lookup table from tools.get_heat_lut for h_min and h_max,
+        only valid if frame holds whole numbers
+        """
+        if heat_lut is None:
+            image = tools.convert_heat_to_rgb(frame, self.colourmap, h_min, h_max)
+        else:
+            image = tools.lookup_rgb(heat_lut, frame.astype(np.uint16))
         if size:
             self.frame_scale = size
-            image = image.resize(
-                (
-                    int(image.width * self.frame_scale),
-                    int(image.height * self.frame_scale),
-                ),
-                mode,
+            height, width = image.shape[:2]
+            image = cv2.resize(
+                image,
+                (int(width * self.frame_scale), int(height * self.frame_scale)),
+                interpolation=interpolation,
             )
-
-        if self.debug:
-            tools.add_heat_number(image, thermal, self.frame_scale)
         return image
 
     def create_track_descriptions(self, clip, predictions):
-        # look for any tracks that occur on this frame
+        # store each track's prediction with its description so they are only looked up once per clip
         for track in clip.tracks:
-            guesses = predictions.guesses_for(track.get_id())
+            prediction = predictions.prediction_for(track.get_id())
+            guesses = prediction.guesses(predictions.labels) if prediction else []
             track_description = "\n".join(guesses)
             track_description.strip()
-            self.track_descs[track] = track_description
+            self.track_descs[track] = (prediction, track_description)
+            # measure the title now rather than when the first frame is drawn
+            text_size(self.font_title, track_description)
 
     def add_regions(self, draw, regions, v_offset=0):
         for rect in regions:
@@ -265,7 +299,7 @@ class Previewer:
 
     def add_footer(self, draw, width, height, text, ffc_affected):
         footer_text = "FFC {} {}".format(ffc_affected, text)
-        footer_size = self.font.getsize(footer_text)
+        footer_size = text_size(self.font, footer_text)
         center = (width / 2 - footer_size[0] / 2.0, height - footer_size[1])
         draw.text((center[0], center[1]), footer_text, font=self.font)
 
@@ -276,7 +310,7 @@ class Previewer:
                 text += "mass {} var {}".format(
                     region.mass, round(region.pixel_variance, 2)
                 )
-        footer_size = self.font.getsize(text)
+        footer_size = text_size(self.font, text)
         footer_center = ((region.width * self.frame_scale) - footer_size[0]) / 2
 
         footer_rect = Region(
@@ -299,7 +333,7 @@ class Previewer:
         screen_bounds,
         v_offset=0,
     ):
-        prediction = track_predictions.prediction_for(track.get_id())
+        prediction, track_description = self.track_descs[track]
         if prediction is None:
             return
 
@@ -309,7 +343,7 @@ class Previewer:
         self.add_text_to_track(
             draw,
             rect,
-            self.track_descs[track],
+            track_description,
             current_prediction_string,
             screen_bounds,
             v_offset,
@@ -318,8 +352,8 @@ class Previewer:
     def add_text_to_track(
         self, draw, rect, header_text, footer_text, screen_bounds, v_offset=0
     ):
-        header_size = self.font_title.getsize(header_text)
-        footer_size = self.font.getsize(footer_text)
+        header_size = text_size(self.font_title, header_text)
+        footer_size = text_size(self.font, footer_text)
         # figure out where to draw everything
         header_rect = Region(
             rect.left * self.frame_scale,
@@ -345,16 +379,9 @@ class Previewer:
         """ Modifies rect so that rect is visible within bounds. """
         if screen_bounds is None:
             return
-        if rect.left < screen_bounds.left:
-            rect.x = screen_bounds.left
-        if rect.top < screen_bounds.top:
-            rect.y = screen_bounds.top
-
-        if rect.right > screen_bounds.right:
-            rect.x = screen_bounds.right - rect.width
-
-        if rect.bottom > screen_bounds.bottom:
-            rect.y = screen_bounds.bottom - rect.height
+        # the far edges take precedence if rect is larger than the bounds
+        rect.x = min(max(rect.x, screen_bounds.left), screen_bounds.right - rect.width)
+        rect.y = min(max(rect.y, screen_bounds.top), screen_bounds.bottom - rect.height)
 
     def rect_points(self, rect, v_offset=0, h_offset=0):
         s = self.frame_scale
@@ -407,22 +434,20 @@ class Previewer:
 
     @staticmethod
     def create_four_tracking_image(frame, min_temp):
-
-        thermal = frame.thermal
-        filtered = frame.filtered + min_temp
-        mask = frame.mask * 10000
+        height, width = frame.thermal.shape
+        # thermal, filtered / mask, flow magnitude
+        image = np.empty((height * 2, width * 2), dtype=np.float32)
+        image[:height, :width] = frame.thermal
+        image[:height, width:] = frame.filtered + min_temp
+        image[height:, :width] = frame.mask * 10000
         flow_h, flow_v = frame.get_flow_split(clip_flow=True)
         if flow_h is None and flow_v is None:
-            flow_magnitude = filtered
+            image[height:, width:] = image[:height, width:]
         else:
-            flow_magnitude = (
-                np.linalg.norm(np.float32([flow_h, flow_v]), ord=2, axis=0) / 4.0
-                + min_temp
+            image[height:, width:] = (
+                cv2.magnitude(np.float32(flow_h), np.float32(flow_v)) / 4.0 + min_temp
             )
-
-        return np.hstack(
-            (np.vstack((thermal, mask)), np.vstack((filtered, flow_magnitude)))
-        )
+        return image
 
     @staticmethod
     def stats_footer(stats):
@@ -436,6 +461,15 @@ class Previewer:
         )
 
 
+@lru_cache(maxsize=4096)
+def text_size(font, text):
+    """
+    Returns the size of text drawn in font, the same few labels are drawn on every
+    frame so sizes are cached rather than measured each time.
+    """
+    return font.getsize(text)
+
+
 def none_or_round(value, decimals=0):
     if value:
         return round(value, decimals)
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import attr
+import pytest
+
+from config.config import Config
+from ml_tools.cptvfileprocessor import CPTVFileProcessor
+
+
+class DateProcessor(CPTVFileProcessor):
+    def get_classify_filename(self, input_filename):
+        return input_filename
+
+
+class TestNeedsProcessing:
+    @pytest.fixture
+    def processor(self, tmp_path):
+        config = Config.get_defaults()
+        config = attr.evolve(
+            config, classify=attr.evolve(config.classify, classify_folder=str(tmp_path))
+        )
+        processor = DateProcessor(config, config.tracking)
+        processor.start_date = datetime(2019, 1, 2)
+        processor.end_date = datetime(2019, 2, 10)
+        return processor
+
+    def test_date_filters(self, processor):
+        assert not processor.needs_processing("/cptv/20190101-235959-device.cptv")
+        assert processor.needs_processing("/cptv/20190102-000000-device.cptv")
+        assert processor.needs_processing("/cptv/20190115-120000-device.cptv")
+        assert processor.needs_processing("/cptv/20190210-235959-device.cptv")
+        assert not processor.needs_processing("/cptv/20190211-000000-device.cptv")
+        assert not processor.needs_processing("/cptv/20181231-device.cptv")
+
+    def test_only_one_bound(self, processor):
+        processor.end_date = None
+        assert processor.needs_processing("/cptv/20200101-000000-device.cptv")
+        processor.start_date = None
+        processor.end_date = datetime(2019, 2, 10)
+        assert processor.needs_processing("/cptv/20180101-000000-device.cptv")
+
+    def test_filename_without_date(self, processor):
+        with pytest.raises(ValueError):
+            processor.needs_processing("/cptv/device-20190115.cptv")
+        with pytest.raises(ValueError):
+            processor.needs_processing("/cptv/2019011-120000-device.cptv")
@@ -21,6 +21,21 @@ class TestRectangle:
         subimage = rectangle.subimage(image)
         assert np.array_equal(subimage, [[32, 33], [42, 43], [52, 53]])
 
+    def test_overlap_areas(self):
+        rectangle = Rectangle(2, 3, 5, 6)
+        others = [
+            Rectangle(0, 0, 4, 4),
+            Rectangle(4, 5, 10, 10),
+            Rectangle(20, 20, 5, 5),
+            Rectangle(2, 3, 5, 6),
+        ]
+
+        overlaps = rectangle.overlap_areas([other.to_ltrb() for other in others])
+        assert np.array_equal(
+            overlaps, [rectangle.overlap_area(other) for other in others]
+        )
+        assert len(rectangle.overlap_areas(np.empty((0, 4)))) == 0
+
 
 def assert_rectangle_values(rect):
     assert rect.left == 2
@@ -0,0 +1,94 @@
+import numpy as np
+
+from ml_tools import tools
+
+
+class TestInterpolateSkipped:
+    def test_no_skip_returns_values(self):
+        values = np.float32([[1, 2], [5, 3], [4, 8]])
+
+        interpolated = tools.interpolate_skipped(values, 1, len(values))
+        assert np.array_equal(interpolated, values)
+
+    def test_interpolates_between_values(self):
+        values = np.float32([0, 3, 9])
+
+        interpolated = tools.interpolate_skipped(values, 3, 7)
+        assert interpolated.dtype == np.float32
+        assert np.array_equal(interpolated, [0, 1, 2, 3, 5, 7, 9])
+
+    def test_frames_after_last_value_keep_it(self):
+        values = np.float32([[0, 6], [3, 0]])
+
+        interpolated = tools.interpolate_skipped(values, 3, 6)
+        assert np.array_equal(
+            interpolated, [[0, 6], [1, 4], [2, 2], [3, 0], [3, 0], [3, 0]]
+        )
+
+    def test_single_value(self):
+        values = np.float32([[0.25, 0.75]])
+
+        interpolated = tools.interpolate_skipped(values, 4, 3)
+        assert np.array_equal(interpolated, np.repeat(values, 3, axis=0))
+
+
+class TestExponentialSmooth:
+    def test_matches_moving_average(self):
+        values = np.random.RandomState(0).rand(50, 4)
+        for dtype in [np.float32, np.float64]:
+            smoothed = tools.exponential_smooth(values.astype(dtype), 0.1)
+            assert smoothed.dtype == dtype
+            assert np.allclose(
+                smoothed, moving_average(values.astype(dtype), 0.1), rtol=1e-6
+            )
+
+    def test_first_value_is_unchanged(self):
+        values = np.float32([[0.5, 0.2]])
+
+        assert np.array_equal(tools.exponential_smooth(values, 0.1), values)
+        assert len(tools.exponential_smooth(values[:0], 0.1)) == 0
+
+
+class TestMedianSmooth:
+    def test_running_median(self):
+        values = np.float32([1, 9, 2, 8, 3])
+
+        assert np.array_equal(tools.median_smooth(values, 3), [1, 2, 8, 3, 3])
+        assert np.array_equal(tools.median_smooth(values, 1), values)
+
+    def test_columns_are_smoothed_separately(self):
+        values = np.float32([[1, 5], [9, 4], [2, 3]])
+
+        assert np.array_equal(tools.median_smooth(values, 3), [[1, 5], [2, 4], [2, 3]])
+
+
+class TestHeatToRGB:
+    colormap = tools.load_colourmap(tools.resource_path("colourmap.dat"))
+
+    def test_heat_lut_matches_colormap(self):
+        frame = np.random.RandomState(0).randint(2000, 5000, (120, 160))
+        frame[0, :3] = [2800, 4200, 0]
+
+        rgb = tools.lookup_rgb(
+            tools.get_heat_lut(self.colormap, 2800, 4200), np.uint16(frame)
+        )
+        assert np.array_equal(rgb, colorise(self.colormap, frame, 2800, 4200))
+
+    def test_nan_uses_bad_colour(self):
+        frame = np.float32(np.random.RandomState(0).randint(2000, 5000, (12, 16)))
+        frame[0, :3] = [np.nan, 2800, 4200]
+
+        rgb = tools.convert_heat_to_rgb(frame, self.colormap, 2800, 4200)
+        assert np.array_equal(rgb, colorise(self.colormap, frame, 2800, 4200))
+
+
+def moving_average(values, smoothing):
+    smoothed = [values[0]]
+    for value in values[1:]:
+        smoothed.append((1 - smoothing) * smoothed[-1] + smoothing * value)
+    return np.array(smoothed)
+
+
+def colorise(colormap, frame, temp_min, temp_max):
+    frame = (np.float32(frame) - temp_min) / (temp_max - temp_min)
+    return np.uint8(255.0 * colormap(frame))[:, :, :3]
@@ -2,6 +2,7 @@
 Helper functions for classification of the tracks extracted from CPTV videos
 """
 
+from functools import lru_cache
 import os.path
 import PIL as pillow
 import numpy as np
@@ -17,6 +18,8 @@ import binascii
 import datetime
 import glob
 import cv2
+import scipy.ndimage
+import scipy.signal
 import timezonefinder
 from matplotlib.colors import LinearSegmentedColormap
 import subprocess
@@ -97,6 +100,25 @@ class Rectangle:
         y_overlap = max(0, min(self.bottom, other.bottom) - max(self.top, other.top))
         return x_overlap * y_overlap
 
+    def overlap_areas(self, others):
+        """
+        Compute the area overlap between this rectangle and many others at once.
+        :param others: numpy array of shape [N, 4] containing left, top, right, bottom of each rectangle
+        :return: numpy array of shape [N] with the overlap area for each rectangle
+        """
+        others = np.asarray(others).reshape(-1, 4)
+        x_overlap = np.minimum(others[:, 2], self.right) - np.maximum(
+            others[:, 0], self.left
+        )
+        y_overlap = np.minimum(others[:, 3], self.bottom) - np.maximum(
+            others[:, 1], self.top
+        )
+        return np.clip(x_overlap, 0, None) * np.clip(y_overlap, 0, None)
+
+    def to_ltrb(self):
+        """ Returns left, top, right, bottom co-ords. """
+        return (self.left, self.top, self.right, self.bottom)
+
     def crop(self, bounds):
         """ Crops this rectangle so that it fits within given bounds"""
         self.left = max(self.left, bounds.left)
@@ -125,11 +147,11 @@ class Rectangle:
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
+        # rectangles (track regions) are by far the most common, so check them first
+        if isinstance(obj, Rectangle):
+            return [int(value) for value in obj.to_ltrb()]
         if isinstance(obj, datetime.datetime):
             return obj.isoformat()
-            # Let the base class default method raise the TypeError
-        if isinstance(obj, Rectangle):
-            return int(obj.left), int(obj.top), int(obj.right), int(obj.bottom)
         # Let the base class default method raise the TypeError
         return json.JSONEncoder.default(self, obj)
 
@@ -302,15 +324,103 @@ def convert_heat_to_img(frame, colormap, temp_min=2800, temp_max=4200):
     :param colormap: an optional colormap to use, if none is provided then tracker.colormap is used.
     :return: a pillow Image containing a colorised heatmap
     """
+    return pillow.Image.fromarray(
+        convert_heat_to_rgb(frame, colormap, temp_min, temp_max)
+    )
+
+
+def convert_heat_to_rgb(frame, colormap, temp_min=2800, temp_max=4200):
+    """
+    Converts a frame in float32 format to a uint8 RGB numpy array.
+    :param frame: the numpy frame contining heat values to convert
+    :param colormap: an optional colormap to use, if none is provided then tracker.colormap is used.
+    :return: numpy array of shape [H, W, 3] containing a colorised heatmap
+    """
     # normalise
     if colormap is None:
         colormap = _load_colourmap(None)
 
     frame = np.float32(frame)
     frame = (frame - temp_min) / (temp_max - temp_min)
-    colorized = np.uint8(255.0 * colormap(frame))
-    img = pillow.Image.fromarray(colorized[:, :, :3])  # ignore alpha
-    return img
+    packed_lut = get_colormap_lut(colormap, packed=True)
+    return lookup_rgb(packed_lut, get_colormap_indices(frame, colormap.N))
+
+
+def get_heat_lut(colormap, temp_min=2800, temp_max=4200):
+    """
+    Returns a lookup table for lookup_rgb with the colour of every uint16 heat value, so
+    frames of whole numbered heat values can be colourised with a single lookup.
+    :return: numpy array of shape [65536]
+    """
+    return pack_rgb_lut(
+        convert_heat_to_rgb(
+            np.arange(2 ** 16, dtype=np.float32), colormap, temp_min, temp_max
+        )
+    )
+
+
+def pack_rgb_lut(lut):
+    """
+    Packs each RGB colour of a uint8 lookup table into a single 32 bit value for lookup_rgb.
+    :param lut: numpy array of shape [N, 3]
+    :return: numpy array of shape [N]
+    """
+    rgba = np.zeros((len(lut), 4), dtype=np.uint8)
+    rgba[:, :3] = lut
+    return rgba.view(np.uint32).ravel()
+
+
+def lookup_rgb(packed_lut, indices):
+    """
+    Looks up the colour of every index in a lookup table from pack_rgb_lut.
+    Taking whole 32 bit values is much quicker than taking rows of 3 bytes.
+    :param indices: numpy array of indices into packed_lut
+    :return: uint8 numpy array of shape indices.shape + (3,)
+    """
+    rgba = packed_lut.take(indices).view(np.uint8).reshape(indices.shape + (4,))
+    if rgba.ndim == 3:
+        return cv2.cvtColor(rgba, cv2.COLOR_RGBA2RGB)
+    return np.ascontiguousarray(rgba[..., :3])
+
+
+_colormap_luts = {}
+
+
+def get_colormap_lut(colormap, packed=False):
+    """
+    Returns the colours of a matplotlib colormap as a uint8 RGB lookup table.
+    Rows 0 to N - 1 are the colormap, followed by the over, bad and under colours,
+    so under can be looked up with index -1.
+    :param packed: if true returns the table packed for lookup_rgb
+    """
+    cached = _colormap_luts.get(id(colormap))
+    if cached is None or cached[0] is not colormap:
+        rgba = np.concatenate(
+            (
+                colormap(np.arange(colormap.N + 1)),
+                colormap(np.float32([np.nan])),
+                colormap(np.int32([-1])),
+            )
+        )
+        # ignore alpha
+        lut = np.uint8(255.0 * rgba)[:, :3]
+        cached = (colormap, lut, pack_rgb_lut(lut))
+        _colormap_luts[id(colormap)] = cached
+    return cached[2] if packed else cached[1]
+
+
+def get_colormap_indices(frame, n):
+    """
+    Maps a normalised frame to indices into a lookup table from get_colormap_lut,
+    binning values the same way a matplotlib colormap with n colours does.
+    """
+    indices = frame * n
+    # 1.0 is the last colour not over
+    indices[indices == n] = n - 1
+    np.clip(indices, -1, n, out=indices)
+    indices[np.isnan(indices)] = n + 1
+    np.floor(indices, out=indices)
+    return indices.astype(np.intp)
 
 
 def most_common(lst):
@@ -403,6 +513,59 @@ def softmax(x):
     return e_x / e_x.sum()
 
 
+def exponential_smooth(values, smoothing):
+    """
+    Exponential moving average along the first axis, starting from the first value.
+    :param values: numpy array of shape [N, ...]
+    :param smoothing: weight given to each new value
+    :return: numpy array of smoothed values, same shape and type as values
+    """
+    smoothed = np.empty_like(values)
+    if len(values) == 0:
+        return smoothed
+    decay = 1 - smoothing
+    smoothed[0] = values[0]
+    # keep the filter coefficients in the same type as values so the result matches
+    # doing the average frame by frame
+    smoothed[1:], _ = scipy.signal.lfilter(
+        np.array([smoothing], dtype=values.dtype),
+        np.array([1, -decay], dtype=values.dtype),
+        values[1:],
+        axis=0,
+        zi=decay * values[:1],
+    )
+    return smoothed
+
+
+def median_smooth(values, size):
+    """
+    Running median along the first axis, the first and last values are repeated to fill
+    the window at the ends.
+    :param values: numpy array of shape [N, ...]
+    :param size: number of values in each median, should be odd
+    :return: numpy array of smoothed values, same shape and type as values
+    """
+    return scipy.ndimage.median_filter(
+        values, size=(size,) + (1,) * (values.ndim - 1), mode="nearest"
+    )
+
+
+def interpolate_skipped(values, skip, length):
+    """
+    Linearly interpolates values taken every skip frames back to one value per frame,
+    frames after the last value keep that value.
+    :param values: numpy array of shape [N, ...] with a value for every skip frames
+    :param skip: number of frames between values
+    :param length: number of frames to return values for
+    :return: numpy array of shape [length, ...], same type as values
+    """
+    lower = np.arange(length) // skip
+    upper = np.minimum(lower + 1, len(values) - 1)
+    weight = (np.arange(length) / skip - lower).astype(values.dtype)
+    weight = weight.reshape((length,) + (1,) * (values.ndim - 1))
+    return values[lower] + weight * (values[upper] - values[lower])
+
+
 def to_HWC(data):
     """ converts from CHW format to HWC format. """
     return np.transpose(data, axes=(1, 2, 0))
@@ -685,7 +848,8 @@ def get_confusion_matrix(pred_class, true_class, classes, normalize=True):
     return cm
 
 
-gzip_compression = {"compression": "gzip"}
+# level 1 is much faster to write than the default and only slightly larger on sparse track data
+gzip_compression = {"compression": "gzip", "compression_opts": 1}
 
 blosc_zstd = blosc_opts(complevel=9, complib="blosc:zstd", shuffle=True)
 
@@ -714,15 +878,12 @@ def calculate_variance(filtered, prev_filtered):
 def blur_and_return_as_mask(frame, threshold):
     """
     Creates a binary mask out of an image by applying a threshold.
-    Any pixels more than the threshold are set 1, all others are set to 0.
+    Any pixels at or above the threshold are set 1, all others are set to 0.
     A blur is also applied as a filtering step
     """
-    thresh = cv2.GaussianBlur(frame, (5, 5), 0)
-    thresh[thresh - threshold < 0] = 0
-    values = thresh[thresh > 0]
-    mass = len(values)
-    values = 1
-    return thresh, mass
+    blurred = cv2.GaussianBlur(frame, (5, 5), 0)
+    mask = (blurred >= threshold).astype(np.uint8)
+    return mask, np.count_nonzero(mask)
 
 
 def get_optical_flow_function(high_quality=False):
@@ -764,9 +925,15 @@ def resource_path(name):
     raise OSError("unable to locate {} resource".format(name))
 
 
+@lru_cache(maxsize=None)
+def get_font(name, size):
+    """ Loads a truetype font from the resources folder, each font and size is only loaded once. """
+    return ImageFont.truetype(resource_path(name), size)
+
+
 def add_heat_number(img, frame, scale):
     draw = ImageDraw.Draw(img)
-    font = ImageFont.truetype(resource_path("Ubuntu-R.ttf"), 8)
+    font = get_font("Ubuntu-R.ttf", 8)
     for y, row in enumerate(frame):
         if y % 4 == 0:
             min_v = np.amin(row)
@@ -785,7 +952,8 @@ def eucl_distance(first, second):
 
 
 def get_clipped_flow(flow):
-    return np.clip(flow * 256, -16000, 16000)
+    # scale in float32 as flow may be stored as float16
+    return np.clip(np.float32(flow) * 256, -16000, 16000)
 
 
 def get_timezone_str(lat, lng):
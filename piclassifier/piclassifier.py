@@ -1,6 +1,7 @@
 from datetime import datetime
 import json
 import logging
+import math
 import os
 import time
 
@@ -194,8 +195,9 @@ class PiClassifier(Processor):
                 if self.fp_index is not None:
                     prediction[self.fp_index] *= 0.8
                 state *= 0.98
+                # plain python maths is much quicker than numpy for a single value
                 mass = region.mass
-                mass_weight = np.clip(mass / 20, 0.02, 1.0) ** 0.5
+                mass_weight = math.sqrt(min(max(mass / 20, 0.02), 1.0))
                 cropped_weight = 0.7 if region.was_cropped else 1.0
 
                 prediction *= mass_weight * cropped_weight
@@ -338,7 +340,7 @@ class PiClassifier(Processor):
             positions = []
             for region in track.bounds_history:
                 track_time = round(region.frame_number / self.clip.frames_per_second, 2)
-                positions.append([track_time, region])
+                positions.append([track_time, [int(v) for v in region.to_ltrb()]])
             track_info["positions"] = positions
 
         with open(os.path.join(self.meta_dir, filename), "w") as f:
@@ -66,22 +66,33 @@ class Frame:
 
         return [self.thermal, self.filtered, self.flow, self.mask]
 
-    def generate_optical_flow(self, opt_flow, prev_frame, flow_threshold=40):
+    def generate_optical_flow(
+        self, opt_flow, prev_frame, flow_threshold=40, flow_buffer=None
+    ):
         """
         Generate optical flow from thermal frames
         :param opt_flow: An optical flow algorithm
+        :param flow_buffer: (optional) float32 array of shape [height, width, 2] to calculate the flow in
         """
         height, width = self.thermal.shape
-        flow = np.zeros([height, width, 2], dtype=np.float32)
+        if flow_buffer is None:
+            flow = np.zeros([height, width, 2], dtype=np.float32)
+        else:
+            flow = flow_buffer
+            flow.fill(0)
         threshold = np.median(self.thermal) + flow_threshold
-        scaled_thermal = np.uint8(np.clip(self.thermal - threshold, 0, 255))
+        # clip the one temporary in place and cast it once
+        scaled_thermal = self.thermal - threshold
+        np.clip(scaled_thermal, 0, 255, out=scaled_thermal)
+        scaled_thermal = scaled_thermal.astype(np.uint8)
         if prev_frame is not None:
             # for some reason openCV spins up lots of threads for this which really slows things down, so we
             # cap the threads to 2
             cv2.setNumThreads(2)
             flow = opt_flow.calc(prev_frame.scaled_thermal, scaled_thermal, flow)
         self.scaled_thermal = scaled_thermal
-        self.flow = flow
+        # flow is kept for the whole clip so store it at half precision
+        self.flow = flow.astype(np.float16)
         if prev_frame:
             prev_frame.scaled_thermal = None
 
@@ -119,6 +130,8 @@ class FrameBuffer:
         self.high_quality_flow = high_quality_flow
         self.frames = None
         self.prev_frame = None
+        # optical flow is calculated into this and then copied to each frame
+        self.flow_buffer = None
         self.calc_flow = calc_flow
         self.keep_frames = keep_frames
         self.current_frame = 0
@@ -133,7 +146,11 @@ class FrameBuffer:
     def add_frame(self, thermal, filtered, mask, frame_number, ffc_affected=False):
         frame = Frame(thermal, filtered, mask, frame_number, ffc_affected=ffc_affected)
         if self.opt_flow:
-            frame.generate_optical_flow(self.opt_flow, self.prev_frame)
+            if self.flow_buffer is None or self.flow_buffer.shape[:2] != thermal.shape:
+                self.flow_buffer = np.empty(thermal.shape + (2,), dtype=np.float32)
+            frame.generate_optical_flow(
+                self.opt_flow, self.prev_frame, flow_buffer=self.flow_buffer
+            )
         self.prev_frame = frame
         if self.keep_frames:
             if self.cache:
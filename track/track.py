@@ -26,8 +26,6 @@ from ml_tools.dataset import TrackChannels
 import track.region
 from track.region import Region
 
-from ml_tools.tools import eucl_distance
-
 
 class Track:
     """ Bounds of a tracked object over time. """
@@ -188,15 +186,15 @@ class Track:
             for bound in self.bounds_history
             if bound.pixel_variance
         ]
-        mid_x = [bound.mid_x for bound in self.bounds_history]
-        mid_y = [bound.mid_y for bound in self.bounds_history]
-        delta_x = [mid_x[0] - x for x in mid_x]
-        delta_y = [mid_y[0] - y for y in mid_y]
-        vel_x = [cur - prev for cur, prev in zip(mid_x[1:], mid_x[:-1])]
-        vel_y = [cur - prev for cur, prev in zip(mid_y[1:], mid_y[:-1])]
+        mid_x = np.array([bound.mid_x for bound in self.bounds_history])
+        mid_y = np.array([bound.mid_y for bound in self.bounds_history])
+        delta_x = mid_x[0] - mid_x
+        delta_y = mid_y[0] - mid_y
+        vel_x = np.diff(mid_x)
+        vel_y = np.diff(mid_y)
 
-        movement = sum((vx ** 2 + vy ** 2) ** 0.5 for vx, vy in zip(vel_x, vel_y))
-        max_offset = max((dx ** 2 + dy ** 2) ** 0.5 for dx, dy in zip(delta_x, delta_y))
+        movement = np.sum(np.sqrt(vel_x ** 2 + vel_y ** 2))
+        max_offset = np.max(np.sqrt(delta_x ** 2 + delta_y ** 2))
 
         # the standard deviation is calculated by averaging the per frame variances.
         # this ends up being slightly different as I'm using /n rather than /(n-1) but that
@@ -282,30 +280,36 @@ class Track:
         location for this track are given high scores, as are regions of a similar size.
         """
 
+        distances, size_differences = self.get_track_region_scores(
+            np.array([[region.x, region.y, region.width, region.height]]),
+            moving_vel_thresh,
+        )
+        return float(distances[0]), float(size_differences[0])
+
+    def get_track_region_scores(self, region_bounds, moving_vel_thresh):
+        """
+        Calculates the same scores as get_track_region_score between this track and many regions at once.
+        :param region_bounds: numpy array of shape [regions, 4] holding x, y, width, height of each region
+        :return: tuple (distances, size_differences), numpy arrays with one score per region
+        """
+        x, y, width, height = region_bounds.T
+        last = self.last_bound
         if abs(self.vel_x) + abs(self.vel_y) >= moving_vel_thresh:
-            expected_x = int(self.last_bound.mid_x + self.vel_x)
-            expected_y = int(self.last_bound.mid_y + self.vel_y)
-            distance = eucl_distance(
-                (expected_x, expected_y), (region.mid_x, region.mid_y)
-            )
+            expected_x = int(last.mid_x + self.vel_x)
+            expected_y = int(last.mid_y + self.vel_y)
+            distance = (expected_x - (x + width / 2)) ** 2 + (
+                expected_y - (y + height / 2)
+            ) ** 2
         else:
-            expected_x = int(self.last_bound.x + self.vel_x)
-            expected_y = int(self.last_bound.y + self.vel_y)
-            distance = eucl_distance((expected_x, expected_y), (region.x, region.y))
-            distance += eucl_distance(
-                (
-                    expected_x + self.last_bound.width,
-                    expected_y + self.last_bound.height,
-                ),
-                (region.x + region.width, region.y + region.height),
-            )
-            distance /= 2.0
+            expected_x = int(last.x + self.vel_x)
+            expected_y = int(last.y + self.vel_y)
+            distance = (expected_x - x) ** 2 + (expected_y - y) ** 2
+            distance += (expected_x + last.width - (x + width)) ** 2 + (
+                expected_y + last.height - (y + height)
+            ) ** 2
+            distance = distance / 2.0
 
-        # ratio of 1.0 = 20 points, ratio of 2.0 = 10 points, ratio of 3.0 = 0 points.
-        # area is padded with 50 pixels so small regions don't change too much
-        size_difference = (
-            abs(region.area - self.last_bound.area) / (self.last_bound.area + 50)
-        ) * 100
+        size_difference = (np.abs(width * height - last.area) / (last.area + 50)) * 100
 
         return distance, size_difference
 
@@ -348,30 +352,21 @@ class Track:
 
     def crop_by_region(self, frame, region, clip_flow=True):
         thermal = region.subimage(frame.thermal)
-        filtered = region.subimage(frame.filtered)
+        # stack together into a numpy array.
+        # by using int16 we lose a little precision on the filtered frames, but not much (only 1 bit)
+        cropped = np.zeros((5,) + thermal.shape, dtype=np.int16)
+        cropped[0] = thermal
+        cropped[1] = region.subimage(frame.filtered)
         if frame.flow is not None:
-            flow_h = region.subimage(frame.flow_h)
-            flow_v = region.subimage(frame.flow_v)
+            flow = region.subimage(frame.flow)
             if clip_flow and not frame.flow_clipped:
-                flow_h = get_clipped_flow(flow_h)
-                flow_v = get_clipped_flow(flow_v)
-        else:
-            flow_h = None
-            flow_v = None
+                flow = get_clipped_flow(flow)
+            cropped[2] = flow[:, :, 0]
+            cropped[3] = flow[:, :, 1]
 
-        mask = region.subimage(frame.mask).copy()
         # make sure only our pixels are included in the mask.
-        mask[mask != region.id] = 0
-        mask[mask > 0] = 1
-
-        # stack together into a numpy array.
-        # by using int16 we lose a little precision on the filtered frames, but not much (only 1 bit)
-        if flow_h is not None and flow_v is not None:
-            return np.int16(np.stack((thermal, filtered, flow_h, flow_v, mask), axis=0))
-        else:
-            empty = np.zeros(filtered.shape)
-            return np.int16(np.stack((thermal, filtered, empty, empty, mask), axis=0))
-        return frame
+        cropped[4] = region.subimage(frame.mask) == region.id
+        return cropped
 
     @property
     def frames(self):
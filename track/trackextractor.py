@@ -270,8 +270,8 @@ class TrackExtractor:
         self.region_history.append(regions)
 
         self.apply_matchings(regions)
-        # do we need to copy?
-        self._prev_filtered = filtered.copy()
+        # filtered is a new array each frame and is not modified after this point, so no need to copy
+        self._prev_filtered = filtered
 
     def get_track_channels(self, track, track_offset, frame_number=None):
         """
@@ -495,9 +495,7 @@ class TrackExtractor:
         # remove the edges of the frame as we know these pixels can be spurious value
         edgeless_filtered = self.crop_rectangle.subimage(filtered)
 
-        thresh = np.uint8(
-            blur_and_return_as_mask(edgeless_filtered, threshold=self.threshold)
-        )
+        thresh = blur_and_return_as_mask(edgeless_filtered, threshold=self.threshold)
         dilated = thresh
 
         # Dilation groups interested pixels that are near to each other into one component(animal/track)
@@ -637,11 +635,15 @@ class TrackExtractor:
             frames[:-1], dtype=np.float32
         )
         average_delta = float(np.mean(np.abs(delta)))
+        background_deviation = float(np.mean(np.abs(filtered)))
 
         # take half the max filtered value as a threshold
+        # filtered is not needed after this so let percentile partition it in place
         threshold = float(
             np.percentile(
-                np.reshape(filtered, [-1]), q=self.config.threshold_percentile
+                np.reshape(filtered, [-1]),
+                q=self.config.threshold_percentile,
+                overwrite_input=True,
             )
             / 2
         )
@@ -658,7 +660,7 @@ class TrackExtractor:
         background_stats.min_temp = float(np.min(frames))
         background_stats.max_temp = float(np.max(frames))
         background_stats.mean_temp = float(np.mean(frames))
-        background_stats.background_deviation = float(np.mean(np.abs(filtered)))
+        background_stats.background_deviation = background_deviation
 
         return background, background_stats
 
@@ -709,10 +711,8 @@ def blur_and_return_as_mask(frame, threshold):
     Any pixels more than the threshold are set 1, all others are set to 0.
     A blur is also applied as a filtering step
     """
-    thresh = cv2.GaussianBlur(np.float32(frame), (5, 5), 0) - threshold
-    thresh[thresh < 0] = 0
-    thresh[thresh > 0] = 1
-    return thresh
+    blurred = cv2.GaussianBlur(np.float32(frame), (5, 5), 0)
+    return (blurred > threshold).astype(np.uint8)
 
 
 class BackgroundAnalysis: